@@ -598,6 +598,11 @@ class ImageGenerator:
         """
         生成曲目信息图片（复用基础函数）
         """
+        # 各难度的定数/物量/谱师，只取一次
+        difficulties = song_data['difficulties']
+        const = tuple(d.get('level_value', 0) for d in difficulties)
+        notes = tuple(d.get('notes', {}).get('total', 0) for d in difficulties)
+        nd = tuple(d.get('note_designer', '未知') for d in difficulties)
 
         if len(song_data['difficulties'])>=5: # 有黑谱
             background_path = self.bgs_dir / 'song_info_bg_1.png'
@@ -690,10 +695,10 @@ class ImageGenerator:
 
         # 处理谱师
         nd_font = ImageFont.truetype(self.fonts_dir / 'LINESeedJP_TTF_Bd.ttf', 34)
-        exp_nd_text = self.truncate_text_to_fit(draw, song_data['difficulties'][2].get('note_designer', '未知'), nd_font, 700)
-        mas_nd_text = self.truncate_text_to_fit(draw, song_data['difficulties'][3].get('note_designer', '未知'), nd_font, 700)
+        exp_nd_text = self.truncate_text_to_fit(draw, nd[2], nd_font, 700)
+        mas_nd_text = self.truncate_text_to_fit(draw, nd[3], nd_font, 700)
         if len(song_data['difficulties'])>=5:
-            ult_nd_text = self.truncate_text_to_fit(draw, song_data['difficulties'][4].get('note_designer', '未知'), nd_font, 700)
+            ult_nd_text = self.truncate_text_to_fit(draw, nd[4], nd_font, 700)
         
         # 文字信息
         if len(song_data['difficulties'])>=5:
@@ -743,70 +748,70 @@ class ImageGenerator:
                 },
                 {
                     # BASIC定数
-                    'text': f"{song_data['difficulties'][0].get('level_value', 0):.1f}",
+                    'text': f"{const[0]:.1f}",
                     'position': (203, 1037),
                     'font': num_font,
                     'color': 'black',
                 },
                 {
                     # ADVANCED定数
-                    'text': f"{song_data['difficulties'][1].get('level_value', 0):.1f}",
+                    'text': f"{const[1]:.1f}",
                     'position': (203, 914),
                     'font': num_font,
                     'color': 'black',
                 },
                 {
                     # EXPERT定数
-                    'text': f"{song_data['difficulties'][2].get('level_value', 0):.1f}",
+                    'text': f"{const[2]:.1f}",
                     'position': (203, 792),
                     'font': num_font,
                     'color': 'black',
                 },
                 {
                     # MASTER定数
-                    'text': f"{song_data['difficulties'][3].get('level_value', 0):.1f}",
+                    'text': f"{const[3]:.1f}",
                     'position': (203, 668),
                     'font': num_font,
                     'color': 'black',
                 },
                 {
                     # ULTIMA定数
-                    'text': f"{song_data['difficulties'][4].get('level_value', 0):.1f}",
+                    'text': f"{const[4]:.1f}",
                     'position': (205, 546),
                     'font': num_font,
                     'color': 'black',
                 },
                 {
                     # BASIC物量
-                    'text': str(song_data['difficulties'][0].get('notes', {}).get('total', 0)),
+                    'text': str(notes[0]),
                     'position': (500, 1037),
                     'font': num_font,
                     'color': 'black',
                 },
                 {
                     # ADVANVED物量
-                    'text': str(song_data['difficulties'][1].get('notes', {}).get('total', 0)),
+                    'text': str(notes[1]),
                     'position': (500, 914),
                     'font': num_font,
                     'color': 'black',
                 },
                 {
                     # EXPERT物量
-                    'text': str(song_data['difficulties'][2].get('notes', {}).get('total', 0)),
+                    'text': str(notes[2]),
                     'position': (500, 792),
                     'font': num_font,
                     'color': 'black',
                 },
                 {
                     # MASTER物量
-                    'text': str(song_data['difficulties'][3].get('notes', {}).get('total', 0)),
+                    'text': str(notes[3]),
                     'position': (500, 668),
                     'font': num_font,
                     'color': 'black',
                 },
                 {
                     # ULTIMA物量
-                    'text': str(song_data['difficulties'][4].get('notes', {}).get('total', 0)),
+                    'text': str(notes[4]),
                     'position': (500, 546),
                     'font': num_font,
                     'color': 'black',
@@ -881,56 +886,56 @@ class ImageGenerator:
                 },
                 {
                     # BASIC定数
-                    'text': f"{song_data['difficulties'][0].get('level_value', 0):.1f}",
+                    'text': f"{const[0]:.1f}",
                     'position': (203, 1037-delta_y),
                     'font': num_font,
                     'color': 'black',
                 },
                 {
                     # ADVANCED定数
-                    'text': f"{song_data['difficulties'][1].get('level_value', 0):.1f}",
+                    'text': f"{const[1]:.1f}",
                     'position': (203, 914-delta_y),
                     'font': num_font,
                     'color': 'black',
                 },
                 {
                     # EXPERT定数
-                    'text': f"{song_data['difficulties'][2].get('level_value', 0):.1f}",
+                    'text': f"{const[2]:.1f}",
                     'position': (203, 792-delta_y),
                     'font': num_font,
                     'color': 'black',
                 },
                 {
                     # MASTER定数
-                    'text': f"{song_data['difficulties'][3].get('level_value', 0):.1f}",
+                    'text': f"{const[3]:.1f}",
                     'position': (203, 668-delta_y),
                     'font': num_font,
                     'color': 'black',
                 },
                 {
                     # BASIC物量
-                    'text': str(song_data['difficulties'][0].get('notes', {}).get('total', 0)),
+                    'text': str(notes[0]),
                     'position': (500, 1037-delta_y),
                     'font': num_font,
                     'color': 'black',
                 },
                 {
                     # ADVANVED物量
-                    'text': str(song_data['difficulties'][1].get('notes', {}).get('total', 0)),
+                    'text': str(notes[1]),
                     'position': (500, 914-delta_y),
                     'font': num_font,
                     'color': 'black',
                 },
                 {
                     # EXPERT物量
-                    'text': str(song_data['difficulties'][2].get('notes', {}).get('total', 0)),
+                    'text': str(notes[2]),
                     'position': (500, 792-delta_y),
                     'font': num_font,
                     'color': 'black',
                 },
                 {
                     # MASTER物量
-                    'text': str(song_data['difficulties'][3].get('notes', {}).get('total', 0)),
+                    'text': str(notes[3]),
                     'position': (500, 668-delta_y),
                     'font': num_font,
                     'color': 'black',
@@ -4,18 +4,25 @@ from astrbot.api import logger
 from astrbot.core.utils.astrbot_path import get_astrbot_data_path
 import astrbot.api.message_components as Comp
 from astrbot.api.event import MessageChain
-import aiohttp
 import asyncio
-import json
 import re
 import os
+from collections import OrderedDict
 from pathlib import Path
-from thefuzz import fuzz
+from rapidfuzz import process, fuzz
+from rapidfuzz.utils import default_process
 
 from .resource_manager import ResourceManager
 from .image_generator import ImageGenerator
 from .web_server import OAuthWebServer
 
+# 搜歌指令：xxx是什么歌
+_SEARCH_RE = re.compile(r"^(.*?)是什么歌$")
+# 模糊匹配打分函数：token_set_ratio 会去重并忽略词序，对重复词、乱序的关键词更宽容
+_FUZZY_SCORER = fuzz.token_set_ratio
+# 搜索结果缓存的最大条目数
+_SEARCH_CACHE_SIZE = 256
+
 @register("chunithm_bot", "Ku2uka", "CHUNITHM机器人", "1.0.1")
 class ChunithmBot(Star):
     def __init__(self, context: Context):
@@ -24,6 +31,8 @@ class ChunithmBot(Star):
         self.res_mgr = ResourceManager("astrbot_plugin_chunithm_bot", data_root)
         self.img_gen = ImageGenerator("astrbot_plugin_chunithm_bot", self.res_mgr, data_root)
         self.web_server = OAuthWebServer(self.res_mgr)
+        self._search_cache = OrderedDict()  # (关键词, 阈值) -> 搜索结果，LRU
+        self._search_cache_version = 0  # 缓存对应的 res_mgr.index_version
         asyncio.create_task(self.initialize())
     
     async def initialize(self):
@@ -36,6 +45,10 @@ class ChunithmBot(Star):
 
         self.web_server.start()
         logger.info(f"启动OAuth网页成功")
+
+    async def terminate(self):
+        """插件卸载时释放资源"""
+        await self.res_mgr.close()
     
     def search_song(self, keyword, threshold=60):
         """
@@ -48,85 +61,154 @@ class ChunithmBot(Star):
         Returns:
             list: 匹配的歌曲列表（按分数排序）
         """
-        if not keyword or not self.res_mgr.songs:
+        # 最高分为100分，更高的阈值不可能有结果
+        if not keyword or not self.res_mgr.songs or threshold > 100:
             return []
         
         keyword = keyword.lower().strip()
-        scored_results = []
+
+        # 歌曲数据在两次重建索引之间不变，可以直接复用之前的搜索结果
+        if self._search_cache_version != self.res_mgr.index_version:
+            self._search_cache.clear()
+            self._search_cache_version = self.res_mgr.index_version
+        key = (keyword, threshold)
+        result = self._search_cache.get(key)
+        if result is not None:
+            self._search_cache.move_to_end(key)
+            return result
         
-        for song in self.res_mgr.songs:
-            # 跳过特定ID范围的歌曲（保留你的逻辑）
-            if song.get('id', 9999) >= 8000:
-                continue
+        result = self._search_song(keyword, threshold)
+        self._search_cache[key] = result
+        if len(self._search_cache) > _SEARCH_CACHE_SIZE:
+            self._search_cache.popitem(last=False)
+        return result
 
-            title = song.get('title', '').lower()
-            aliases = [a.lower() for a in song.get('aliases', [])]
-            
-            score = 0
+    def _search_song(self, keyword, threshold):
+        """search_song 的实际搜索逻辑（keyword 已转小写并去除首尾空白）"""
+        # 0-1. 通过ID（格式：c1234）或曲名完全匹配 (100分)：直接查表
+        result = list(self.res_mgr.title_index.get(keyword, []))
+        id_song = self.res_mgr.id_index.get(keyword)
+        if id_song is not None and all(song is not id_song for song in result):
+            result.insert(0, id_song)
+        if result:
+            return result
 
-            # 0. 通过ID搜索（格式：c1234）
-            if keyword == 'c' + str(song.get('id', 9999)):
-                score = 100
-            
-            # 1. 完全匹配曲名 (100分)
-            elif keyword == title:
-                score = 100
-            
-            # 2. 完全匹配别称 (95分)
-            elif keyword in aliases:
-                score = 95
-            
-            # 3. 关键词在曲名中 (90分)
-            elif keyword in title:
-                score = 90
-            
-            # 4. 关键词在别称中 (85分)
-            elif any(keyword in alias for alias in aliases):
-                score = 85
-            
-            # 5. 模糊匹配 (最高89分)
-            else:
-                # 和曲名模糊匹配
-                title_score = fuzz.token_sort_ratio(keyword, title)
-                # 和别称模糊匹配
-                alias_scores = [fuzz.token_sort_ratio(keyword, alias) for alias in aliases]
-                alias_score = max(alias_scores) if alias_scores else 0
-                
-                raw_score = max(title_score, alias_score)
-                score = min(raw_score, 89)  # 模糊匹配不超过89分
-            
-            # 只有分数达到阈值才加入结果
-            if score >= threshold:
-                scored_results.append((score, song))
+        # 之后的匹配方式最高95分，达不到阈值时直接返回
+        if threshold > 95:
+            return []
+
+        # 2. 完全匹配别称 (95分)：直接查表
+        result = self.res_mgr.alias_index.get(keyword)
+        if result:
+            return list(result)
+
+        songs = self.res_mgr.searchable_songs
+
+        # 3-4. 包含匹配 (85-90分)
+        max_score, hits = self._exact_pass(keyword)
+        contained = set(hits)
+        if max_score < threshold:
+            max_score, hits = 0, []
+        
+        # 关键词在曲名中 (90分) 已高于模糊匹配上限 (89分)，无需再模糊匹配
+        if max_score >= 90:
+            return [songs[idx] for idx in hits]
         
-        # 按分数从高到低排序
-        scored_results.sort(key=lambda x: x[0], reverse=True)
+        # 5. 模糊匹配：只需考虑不低于当前最高分的结果，已包含匹配的歌曲不再参与
+        fuzzy_score, fuzzy_hits = self._fuzzy_pass(keyword, max(threshold, max_score), skip=contained)
+        if fuzzy_score > max_score:
+            hits = fuzzy_hits
+        elif fuzzy_score == max_score:
+            hits = sorted(hits + fuzzy_hits)
         
-        # 只选出分数最高的曲子（可以并列）
+        return [songs[idx] for idx in hits]
+
+    def _exact_pass(self, keyword):
+        """
+        包含匹配：关键词在曲名 (90分) 或别称 (85分) 中
+        
+        Returns:
+            tuple: (最高分, 该分数的歌曲在 searchable_songs 中的下标列表)
+        """
+        # 直接扫描曲名/别名的扁平列表，不再逐首歌曲查字典
+        # 3. 关键词在曲名中 (90分)：只要有命中，就一定是最高分
+        result = [idx for idx, title in enumerate(self.res_mgr.title_list) if keyword in title]
+        if result:
+            return 90, result
+        
+        # 4. 关键词在别称中 (85分)
+        alias_owner = self.res_mgr.alias_owner
+        result = sorted({alias_owner[i] for i, alias in enumerate(self.res_mgr.alias_list) if keyword in alias})
+        if result:
+            return 85, result
+        
+        return 0, []
+
+    def _fuzzy_pass(self, keyword, cutoff, skip=()):
+        """
+        模糊匹配：一次性对全部曲名和别名打分，按歌曲取最大值 (最高89分)
+        
+        Args:
+            keyword: 搜索关键词（已转小写）
+            cutoff: 最低分数，低于该分数的结果直接丢弃
+            skip: 不参与模糊匹配的歌曲下标
+        
+        Returns:
+            tuple: (最高分, 该分数的歌曲在 searchable_songs 中的下标列表)
+        """
+        # 模糊匹配不超过89分，更高的最低分数不可能有结果
+        if cutoff > 89:
+            return 0, []
+        
+        # 分数会四舍五入为整数（与 thefuzz 行为一致），因此预筛时放宽0.5分（不能低于0）
+        # extract_iter 逐个产出达标结果，不像 extract 那样先构建并排序完整列表
+        # 曲名/别名已在加载时归一化，这里只需归一化关键词
+        score_cutoff = max(cutoff - 0.5, 0)
+        query = default_process(keyword)
+        fuzzy_scores = {}
+        for _, raw, idx in process.extract_iter(query, self.res_mgr.title_keys, scorer=_FUZZY_SCORER,
+                                                processor=None, score_cutoff=score_cutoff):
+            fuzzy_scores[idx] = raw
+        for _, raw, i in process.extract_iter(query, self.res_mgr.alias_keys, scorer=_FUZZY_SCORER,
+                                              processor=None, score_cutoff=score_cutoff):
+            idx = self.res_mgr.alias_owner[i]
+            # 已达到模糊匹配上限 (89分) 的歌曲无需再比较
+            best = fuzzy_scores.get(idx, 0)
+            if best <= 88.5 and raw > best:
+                fuzzy_scores[idx] = raw
+        
+        max_score = cutoff
         result = []
-        if scored_results:
-            max_score = scored_results[0][0]
-            for score, song in scored_results:
-                if score < max_score:
-                    break
-                result.append(song)
+        for idx in sorted(fuzzy_scores):
+            if idx in skip:
+                continue
+            score = min(round(fuzzy_scores[idx]), 89)  # 模糊匹配不超过89分
+            if score > max_score:
+                max_score = score
+                result = [idx]
+            elif score == max_score:
+                result.append(idx)
         
-        return result
+        if not result:
+            return 0, []
+        return max_score, result
     
-    @filter.regex(r"^(.*?)是什么歌$")
+    @filter.regex(_SEARCH_RE.pattern)
     async def cmd_search(self, event: AstrMessageEvent):
         '''搜索歌曲。用法：xxx是什么歌'''      
         # 从消息文本中提取关键词
         message = event.message_str.strip()
         
-        match = re.search(r"^(.*?)是什么歌$", message)
+        match = _SEARCH_RE.match(message)
         if not match:
             return
         
         keyword = match.group(1).strip()
 
-        # 确保数据已加载
-        if not self.res_mgr.songs:
+        # 确保数据已加载且搜索索引已构建
+        try:
+            await asyncio.wait_for(self.res_mgr.ready.wait(), timeout=0.1)
+        except asyncio.TimeoutError:
             yield event.plain_result("数据正在加载中，请稍后重试...")
             return
             
@@ -1,6 +1,11 @@
 import aiohttp
 import asyncio
+import hashlib
 import json
+import os
+import sys
+import orjson
+import ijson
 from pathlib import Path
 from astrbot.api import logger
 from curl_cffi.requests import AsyncSession
@@ -8,6 +13,7 @@ from enum import Enum
 import time
 import sqlite3
 from threading import Lock
+from rapidfuzz.utils import default_process
 
 class ResourceManager:
     """资源管理器：负责歌曲数据的加载"""
@@ -22,8 +28,26 @@ class ResourceManager:
         self.plugin_dir.mkdir(parents=True, exist_ok=True)
         self.help_image = self.plugin_dir / "help_image.png"
         self.songs_file = self.plugin_dir / "songs.json"
+        self._songs_hash = None  # songs.json 当前内容的 sha256，用于跳过无变化的写入
         self.songs = []
         self.song_map = {}
+        self._session = None  # 复用的 aiohttp 会话，在 _get_session 中懒加载
+        # 搜索索引：可搜索的歌曲，以及曲名/别名的扁平列表，供 RapidFuzz 批量打分
+        self.searchable_songs = []
+        self.title_list = []
+        self.alias_list = []
+        self.alias_owner = []  # alias_list 下标 -> searchable_songs 下标
+        # 经 default_process 归一化后的曲名/别名（与上面两个列表一一对应），模糊匹配时不再逐次归一化
+        self.title_keys = []
+        self.alias_keys = []
+        # 完全匹配索引：ID关键字/小写曲名/小写别名 -> 歌曲
+        self.id_index = {}
+        self.title_index = {}
+        self.alias_index = {}
+        # 每次重建搜索索引时递增，依赖歌曲数据的缓存据此判断是否失效
+        self.index_version = 0
+        # 搜索索引构建完成后置位，搜索前等待它，避免读到加载到一半的数据
+        self.ready = asyncio.Event()
         self.version_map = {0: "UNKNOWN"}
         self.temp_dir = self.plugin_dir / "temp_images"
         self.temp_dir.mkdir(exist_ok=True)
@@ -445,28 +469,124 @@ class ResourceManager:
         """
         if force_refresh: # or len(self.VERSION_MAP) <= 1:
             await self.fetch_from_api()
+            self.build_search_index()
             return self.songs
         
         # 尝试从本地加载
         if self.songs_file.exists():
             try:
-                with open(self.songs_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.songs = data.get('songs', [])
-                    for song in self.songs:
-                        self.song_map[song.get('id', 0)] = song
-                    versions = data.get('versions', [])
-                    for version in versions:
-                        self.version_map[version.get('version', 0)] = version.get('title', '未知')
+                # 在线程中读取并解析，避免阻塞事件循环
+                data = await asyncio.to_thread(self._read_songs_file)
+                self.songs = data.get('songs', [])
+                for song in self.songs:
+                    self.song_map[song.get('id', 0)] = song
+                versions = data.get('versions', [])
+                for version in versions:
+                    self.version_map[version.get('version', 0)] = version.get('title', '未知')
                 logger.info(f"从本地加载了 {len(self.songs)} 首歌曲")
+                self.build_search_index()
                 return self.songs
             except Exception as e:
                 logger.error(f"读取本地文件失败: {e}")
         
         # 本地没有，从API获取
         await self.fetch_from_api()
+        self.build_search_index()
         return self.songs
+
+    def build_search_index(self):
+        """
+        构建搜索索引（每次加载数据后调用一次）
+
+        预先计算每首歌的小写曲名、小写别名和ID关键字（c1234），
+        避免每次搜索时重复转换；结果只存入索引，不写回歌曲数据
+        """
+        self.searchable_songs = []
+        self.title_list = []
+        self.alias_list = []
+        self.alias_owner = []
+        self.title_keys = []
+        self.alias_keys = []
+        self.id_index = {}
+        self.title_index = {}
+        self.alias_index = {}
+        for song in self.songs:
+            # 跳过特定ID范围的歌曲
+            if song.get('id', 9999) >= 8000:
+                continue
+
+            # 别名在不同歌曲间大量重复，驻留后相同字符串只保留一份
+            title = sys.intern(song.get('title', '').lower())
+            aliases = tuple(sys.intern(a.lower()) for a in song.get('aliases', []))
+
+            idx = len(self.searchable_songs)
+            self.searchable_songs.append(song)
+            self.title_list.append(title)
+            self.title_keys.append(default_process(title))
+            for alias in aliases:
+                self.alias_list.append(alias)
+                self.alias_keys.append(default_process(alias))
+                self.alias_owner.append(idx)
+
+            self.id_index['c' + str(song.get('id', 9999))] = song
+            self.title_index.setdefault(title, []).append(song)
+            for alias in set(aliases):
+                self.alias_index.setdefault(alias, []).append(song)
+
+        self.index_version += 1
+        if self.searchable_songs:
+            self.ready.set()
+        else:
+            self.ready.clear()
     
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """获取复用的 aiohttp 会话（保留连接池，避免每次刷新重新建立TLS连接）"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=10, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(total=15)
+            )
+        return self._session
+
+    async def close(self):
+        """关闭复用的 aiohttp 会话（插件卸载时调用）"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _fetch_songs(self, session: aiohttp.ClientSession, url: str) -> dict:
+        """
+        获取歌曲列表（含谱面信息）
+
+        响应体较大，边接收边用 ijson（C 后端）流式解析顶层字段，不再先缓存完整响应
+        
+        Returns:
+            dict: {"songs": [...], "versions": [...]}
+        """
+        data = {}
+        async with session.get(url, params={"version": 23000, "notes": "true"}) as resp:
+            if resp.status != 200:
+                raise Exception(f"歌曲API返回错误: {resp.status}")
+            # use_float：数字解析为 float 而非 Decimal，便于后续 orjson 序列化
+            async for key, value in ijson.kvitems(resp.content, '', use_float=True):
+                if key in ('songs', 'versions'):
+                    data[key] = value
+
+        songs = data.get('songs', [])
+        # 特定ID范围的歌曲不参与搜索，不需要物量信息
+        for song in songs:
+            if song.get('id', 9999) >= 8000:
+                for difficulty in song.get('difficulties', []):
+                    difficulty.pop('notes', None)
+        return {"songs": songs, "versions": data.get('versions', [])}
+
+    async def _fetch_aliases(self, session: aiohttp.ClientSession, url: str) -> dict:
+        """获取歌曲别名列表"""
+        async with session.get(url) as resp:
+            if resp.status != 200:
+                raise Exception(f"别名API返回错误: {resp.status}")
+            return await resp.json()
+
     async def fetch_from_api(self):
         """从API获取歌曲和别名数据"""
         logger.info("正在从API加载曲目数据...")
@@ -475,47 +595,64 @@ class ResourceManager:
         url_alias = "https://maimai.lxns.net/api/v0/chunithm/alias/list"
         
         try:
-            async with aiohttp.ClientSession() as session:
-                versions = []
-                # 获取歌曲列表
-                async with session.get(url_songs, params={"version": 23000, "notes": "true"}) as resp:
-                    if resp.status != 200:
-                        raise Exception(f"歌曲API返回错误: {resp.status}")
-                    data = await resp.json()
-                    songs = data.get("songs", [])
-                    for song in songs:
-                        self.song_map[song.get('id', 0)] = song
-                    # 获取版本
-                    versions = data.get("versions")
-                    for version in versions:
-                        self.version_map[version.get('version', 0)] = version.get('title', '未知')
-                
-                # 获取别名
-                async with session.get(url_alias) as resp_alias:
-                    if resp_alias.status == 200:
-                        alias_data = await resp_alias.json()
-                        alias_map = {item['song_id']: item['aliases'] 
-                                   for item in alias_data.get('aliases', [])}
-                        
-                        for song in songs:
-                            song['aliases'] = alias_map.get(song['id'], [])
-                        logger.info(f"获取到 {len(alias_map)} 首歌曲的别名")
-                    else:
-                        for song in songs:
-                            song['aliases'] = []
-                        logger.warning(f"别名API返回错误: {resp_alias.status}")
-                
-                # 保存到本地
-                self.songs = songs
-                with open(self.songs_file, 'w', encoding='utf-8') as f:
-                    json.dump({"songs": self.songs, "versions": versions}, f, ensure_ascii=False, indent=2)
-                
-                logger.info(f"从API加载了 {len(self.songs)} 首歌曲")
-                
+            session = await self._get_session()
+            # 并发获取歌曲列表和别名
+            data, alias_data = await asyncio.gather(
+                self._fetch_songs(session, url_songs),
+                self._fetch_aliases(session, url_alias),
+                return_exceptions=True
+            )
+
+            # 歌曲列表获取失败则整体失败
+            if isinstance(data, Exception):
+                raise data
+            songs = data.get("songs", [])
+            # 获取版本
+            versions = data.get("versions")
+            for version in versions:
+                self.version_map[version.get('version', 0)] = version.get('title', '未知')
+
+            # 别名获取失败时仍保留歌曲数据，只是没有别名
+            if isinstance(alias_data, Exception):
+                alias_map = {}
+                logger.warning(f"获取别名失败: {alias_data}")
+            else:
+                alias_map = {item['song_id']: item['aliases'] 
+                           for item in alias_data.get('aliases', [])}
+                logger.info(f"获取到 {len(alias_map)} 首歌曲的别名")
+
+            for song in songs:
+                self.song_map[song.get('id', 0)] = song
+                song['aliases'] = alias_map.get(song['id'], [])
+            
+            # 保存到本地
+            self.songs = songs
+            payload = orjson.dumps({"songs": self.songs, "versions": versions})
+            payload_hash = hashlib.sha256(payload).hexdigest()
+            if payload_hash != self._songs_hash:
+                await asyncio.to_thread(self._write_songs_file, payload)
+                self._songs_hash = payload_hash
+            else:
+                logger.info("曲目数据无变化，跳过写入本地文件")
+            
+            logger.info(f"从API加载了 {len(self.songs)} 首歌曲")
+            
         except Exception as e:
             logger.error(f"加载数据失败: {e}")
             self.songs = []
 
+    def _read_songs_file(self) -> dict:
+        """读取并解析 songs.json，同时记录内容哈希（在线程中调用）"""
+        raw = self.songs_file.read_bytes()
+        self._songs_hash = hashlib.sha256(raw).hexdigest()
+        return orjson.loads(raw)
+
+    def _write_songs_file(self, payload: bytes):
+        """原子写入 songs.json：先写临时文件再替换，避免中途失败留下损坏的文件（在线程中调用）"""
+        tmp_file = self.songs_file.with_suffix('.tmp')
+        tmp_file.write_bytes(payload)
+        os.replace(tmp_file, self.songs_file)
+
     def cleanup_old_files(self, max_age_hours=1):
         """
         清理过期的临时文件